@@ -178,7 +178,7 @@ class ShabbatScheduleGenerator:
         return "summer" if start_summer <= today <= end_summer else "winter"
 
     def fetch_roshchodesh_dates(self, start_date, end_date):
-        url = "https://www.hebcal.com/hebcal "
+        url = "https://www.hebcal.com/hebcal"
         params = {
             "v": 1,
             "cfg": "json",
@@ -162,7 +162,7 @@ class ShabbatScheduleGenerator:
 
     def fetch_roshchodesh_dates(self, start_date, end_date):
         """Récupère les premiers jours de Rosh Chodesh via l'API Hebcal."""
-        url = "https://www.hebcal.com/hebcal "
+        url = "https://www.hebcal.com/hebcal"
         params = {
             "v": 1,
             "cfg": "json",
@@ -311,7 +311,7 @@ class ShabbatScheduleGenerator:
     def get_hebcal_times(self, start_date, end_date):
         """Récupère les horaires via l'API Hebcal."""
         tz = pytz.timezone("Asia/Jerusalem")
-        base_url = "https://www.hebcal.com/shabbat "
+        base_url = "https://www.hebcal.com/shabbat"
         params = {
             "cfg": "json",
             "geonameid": "293397",
@@ -129,7 +129,7 @@ class ShabbatScheduleGenerator:
         Pour le nom, on tente de récupérer la version hébraïque via la clé "hebrew".
         """
         tz = pytz.timezone("Asia/Jerusalem")
-        base_url = "https://www.hebcal.com/shabbat "
+        base_url = "https://www.hebcal.com/shabbat"
         params = {
             "cfg": "json",
             "geonameid": "293397",
@@ -1,20 +1,41 @@
 import os
 import sys
+import json
+import time
+import hashlib
 from pathlib import Path
 from datetime import datetime, timedelta, date
-import math
+from functools import cached_property, lru_cache
 import requests
 import pytz
+import numpy as np
 import pandas as pd
-from PIL import Image, ImageDraw, ImageFont
-from astral import LocationInfo
-from astral.sun import sun
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+from astral import LocationInfo, Observer
+from astral.sun import sunset
 import unicodedata
 import re
 import shutil
 from zmanim.hebrew_calendar.jewish_calendar import JewishCalendar
 
 ICS_PATH = Path(__file__).parent / "resources" / "jeunes.ics"
+HEBCAL_CACHE_TTL = 24 * 3600  # secondes
+JERUSALEM_TZ = pytz.timezone("Asia/Jerusalem")
+DEBUG = bool(os.environ.get("HORAIRES_SHABBAT_DEBUG"))  # traces de débogage seulement si demandé
+
+# Horaires fixes en minutes (déjà multiples de 5 : pas d'arrondi à refaire à chaque calcul)
+SHACHARIT_MIN = 7 * 60 + 45
+TEHILIM_ETE_MIN = 17 * 60
+TEHILIM_HIVER_MIN = 15 * 60
+SHIUR_NASHIM_MIN = 16 * 60
+
+# Recul (en jours) du Rosh Chodesh vers le vendredi mevarchim, indexé par weekday() (lundi = 0)
+MEVARCHIM_OFFSETS = (3, 4, 5, 6, 7, 8, 2)
+
+# "HH:MM" précalculé pour chaque minute de la journée
+TIME_LUT = tuple(f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60))
+_SLUG_STRIP = re.compile(r'[^\w\s-]')
+_SLUG_SPACE = re.compile(r'\s+')
 
 HEBREW_MONTHS = {
     1: 'ניסן', 2: 'אייר', 3: 'סיון', 4: 'תמוז',
@@ -25,18 +46,9 @@ HEBREW_MONTHS = {
 HEBREW_DAYS = ['ראשון', 'שני', 'שלישי', 'רביעי', 'חמישי', 'שישי', 'שבת']
 
 def get_jewish_month_name_hebrew(jm, jy):
-    # ✅ FIX: Utiliser une approche plus robuste
-    try:
-        cal = JewishCalendar()
-        cal.set_jewish_date(jy, jm, 1)
-        # Vérifier si c'est une année bissextile hébraïque
-        cal2 = JewishCalendar()
-        cal2.set_jewish_date(jy, 13, 1)
-        # Si on peut définir le mois 13, c'est une année bissextile
-        is_leap_year = True
-    except:
-        is_leap_year = False
-    
+    # Année bissextile hébraïque (cycle métonique de 19 ans) : calcul direct, sans construire de JewishCalendar
+    is_leap_year = (7 * jy + 1) % 19 < 7
+
     if jm == 12 and is_leap_year:
         return 'אדר א׳'
     if jm == 13:
@@ -44,16 +56,47 @@ def get_jewish_month_name_hebrew(jm, jy):
     return HEBREW_MONTHS.get(jm, 'חודש לא ידוע')
 
 def find_previous_rosh_chodesh(date_):
-    current_date = date_
-    for i in range(30):
-        cal = JewishCalendar(current_date)
-        if cal.jewish_day == 1:
-            return current_date
-        current_date -= timedelta(days=1)
-    raise Exception("Aucun Rosh Khodesh trouvé dans les 30 jours précédents")
-
-def reverse_hebrew_text(text):
-    return text[::-1]
+    # Le 1er du mois hébraïque est (jour hébraïque - 1) jours plus tôt : un seul JewishCalendar
+    cal = JewishCalendar(date_)
+    return date_ - timedelta(days=cal.jewish_day - 1)
+
+def format_time_array(minutes):
+    # Version vectorisée de format_time : tableau de minutes -> "HH:MM" ("" si négatif)
+    minutes = np.asarray(minutes, dtype=np.int64)
+    hours = np.char.zfill((minutes // 60).astype(str), 2)
+    mins = np.char.zfill((minutes % 60).astype(str), 2)
+    return np.where(minutes < 0, "", np.char.add(np.char.add(hours, ":"), mins))
+
+def get_mevarchim_fridays(rosh_dates):
+    # Version vectorisée de get_mevarchim_friday : tableau trié et unique des vendredis mevarchim
+    rd = np.array(rosh_dates, dtype="datetime64[D]")
+    weekday = (rd.astype(np.int64) + 3) % 7  # 1970-01-01 était un jeudi (weekday() == 3)
+    delta = np.take(MEVARCHIM_OFFSETS, weekday)
+    return np.unique(rd - delta.astype("timedelta64[D]"))
+
+@lru_cache(maxsize=8)
+def _season_for(day):
+    # Heure d'été israélienne (vendredi avant le dernier dimanche de mars -> dernier dimanche d'octobre),
+    # lue dans la base tz plutôt que des dates fixes qui se décalent d'une année à l'autre
+    noon = JERUSALEM_TZ.localize(datetime(day.year, day.month, day.day, 12))
+    return "summer" if noon.dst() else "winter"
+
+@lru_cache(maxsize=2048)
+def _sunset_cached(latitude, longitude, timezone, day):
+    # Le coucher du soleil ne dépend que du lieu et de la date : calcul astral une seule fois
+    return sunset(Observer(latitude, longitude), date=day, tzinfo=timezone)
+
+@lru_cache(maxsize=256)
+def _text_mask(font, text):
+    return font.getmask2(text, mode="L")
+
+def draw_text_cached(img, xy, text, font, fill):
+    # Même rendu que draw.text, mais le masque de glyphes n'est calculé qu'une fois par texte
+    if not text:
+        return
+    mask, (dx, dy) = _text_mask(font, text)
+    x, y = xy[0] + dx, xy[1] + dy
+    img.im.paste(ImageColor.getcolor(fill, img.mode), (x, y, x + mask.size[0], y + mask.size[1]), mask)
 
 def get_weekday_name_hebrew(dt):
     return HEBREW_DAYS[(dt.weekday() + 1) % 7]
@@ -121,13 +164,12 @@ def calculate_last_kiddush_levana_date(gregorian_date):
     latest_time = molad_dt + timedelta(days=13, hours=18)
     return molad_dt, latest_time
 
-def find_next_rosh_chodesh(date_):
-    current_date = date_
-    while True:
-        cal = JewishCalendar(current_date)
-        if cal.jewish_day == 1:
-            return current_date
-        current_date += timedelta(days=1)
+def parse_ics_datetime(value):
+    # "YYYYMMDDTHHMMSS" découpé en entiers (plus rapide que strptime)
+    if len(value) != 15 or value[8] != "T":
+        return datetime.strptime(value, "%Y%m%dT%H%M%S")  # format inattendu : même erreur qu'avant
+    return datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]),
+                    int(value[9:11]), int(value[11:13]), int(value[13:15]))
 
 def parse_tekufa_ics(filepath):
     tekufot = []
@@ -144,7 +186,7 @@ def parse_tekufa_ics(filepath):
                     dtstr = current_event["DTSTART"]
                     if dtstr.startswith("TZID=Asia/Jerusalem:"):
                         dtstr = dtstr.replace("TZID=Asia/Jerusalem:", "")
-                    dt = datetime.strptime(dtstr, "%Y%m%dT%H%M%S")
+                    dt = parse_ics_datetime(dtstr)
                     summary = current_event["SUMMARY"]
                     tekufot.append((dt, summary))
                 in_event = False
@@ -171,12 +213,12 @@ def parse_fast_ics(ics_path):
             in_event = True
         elif line == "END:VEVENT":
             if "DTSTART" in current and "SUMMARY" in current:
-                dt = datetime.strptime(current["DTSTART"], "%Y%m%dT%H%M%S")
+                dt = parse_ics_datetime(current["DTSTART"])
                 fasts.append({
                     "date": dt.date(),
                     "summary": current["SUMMARY"],
                     "start": dt,
-                    "end": datetime.strptime(current["DTEND"], "%Y%m%dT%H%M%S") if "DTEND" in current else None
+                    "end": parse_ics_datetime(current["DTEND"]) if "DTEND" in current else None
                 })
             in_event = False
         elif in_event:
@@ -208,27 +250,8 @@ def get_fast_from_ics_for_week(shabbat_date, ics_path=ICS_PATH):
         if week_start <= f["date"] <= week_end
     ]
 
-class ShabbatScheduleGenerator:
-    def __init__(self, template_path, font_path, arial_bold_path, output_dir):
-        self.template_path = Path(template_path)
-        self.font_path = Path(font_path)
-        self.arial_bold_path = Path(arial_bold_path)
-        self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(parents=True, exist_ok=True)
-
-        if not self.template_path.exists():
-            raise FileNotFoundError(f"Template introuvable: {self.template_path}")
-        if not self.font_path.exists():
-            raise FileNotFoundError(f"Police introuvable: {self.font_path}")
-        if not self.arial_bold_path.exists():
-            raise FileNotFoundError(f"Police Arial Bold introuvable: {self.arial_bold_path}")
-
-        self._font = ImageFont.truetype(str(self.font_path), 30)
-        self._arial_bold_font = ImageFont.truetype(str(self.arial_bold_path), 40)
-        self.season = self.determine_season()
-        self.ramat_gan = LocationInfo("Ramat Gan", "Israel", "Asia/Jerusalem", 32.0680, 34.8248)
-
-        self.yearly_shabbat_data = [
+# Chabbatot intégrées (repli sans classeur) : construites une seule fois à l'import
+YEARLY_SHABBAT_DATA = [
             {'day': '2025-07-11 00:00:00', 'פרשה': 'בלק', 'כנסית שבת': '19:31', 'צאת שבת': '20:31'},
             {'day': '2025-07-18 00:00:00', 'פרשה': 'פינחס', 'כנסית שבת': '19:28', 'צאת שבת': '20:27'},
             {'day': '2025-07-25 00:00:00', 'פרשה': 'מטות-מסעי', 'כנסית שבת': '19:24', 'צאת שבת': '20:23'},
@@ -502,7 +525,48 @@ class ShabbatScheduleGenerator:
 {'day': '2030-09-13 18:31:00', 'פרשה': 'כי־תבוא', 'כנסית שבת': '18:31', 'צאת שבת': '19:25'},
 {'day': '2030-09-20 18:22:00', 'פרשה': 'נצבים-וילך', 'כנסית שבת': '18:22', 'צאת שבת': '19:15'},
 {'day': '2030-09-27 18:10:00', 'פרשה': 'ראש=השנה', 'כנסית שבת': '18:10', 'צאת שבת': '19:06'},
-        ]
+]
+
+# Données intégrées parsées une seule fois à l'import ("day" en datetime.date), en colonnes
+YEARLY_DF = pd.DataFrame(YEARLY_SHABBAT_DATA)
+YEARLY_DF["day"] = pd.to_datetime(YEARLY_DF["day"], format="%Y-%m-%d %H:%M:%S").dt.date
+YEARLY_DF = YEARLY_DF.sort_values(by="day").reset_index(drop=True)
+YEARLY_DAYS = np.array(YEARLY_DF["day"].tolist(), dtype="datetime64[D]")  # trié, pour searchsorted
+
+class ShabbatScheduleGenerator:
+    def __init__(self, template_path, font_path, arial_bold_path, output_dir):
+        self.template_path = Path(template_path)
+        self.font_path = Path(font_path)
+        self.arial_bold_path = Path(arial_bold_path)
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._session = requests.Session()
+        self._hebcal_cache_path = self.output_dir / ".hebcal_cache.json"
+        self._workbook_hash_path = self.output_dir / ".horaires_shabbat.hash.json"
+        self._roshchodesh_cache = {}  # (start, end) -> dates Rosh Chodesh déjà récupérées
+        self._sheets = None  # onglets du classeur tels qu'écrits pendant ce run
+        self._pending_workbook = None  # classeur dont l'écriture est différée (une seule écriture par run)
+
+        if not self.template_path.exists():
+            raise FileNotFoundError(f"Template introuvable: {self.template_path}")
+        if not self.font_path.exists():
+            raise FileNotFoundError(f"Police introuvable: {self.font_path}")
+        if not self.arial_bold_path.exists():
+            raise FileNotFoundError(f"Police Arial Bold introuvable: {self.arial_bold_path}")
+
+        self._icons = None
+        self._templates = {}
+        # Template Rosh Hodesh résolu une seule fois (repli sur le template standard)
+        rc_template = self.template_path.parent / "template_rosh_hodesh.jpg"
+        self._rc_template_path = rc_template if rc_template.exists() else self.template_path
+        self.season = self.determine_season()
+        self._mincha_gdola = 12 * 60 + (45 if self.season == "winter" else 60)
+        self.ramat_gan = LocationInfo("Ramat Gan", "Israel", "Asia/Jerusalem", 32.0680, 34.8248)
+
+        self.yearly_shabbat_data = YEARLY_SHABBAT_DATA
+
+        self._yearly_df = YEARLY_DF
+        self._yearly_days = YEARLY_DAYS
 
         self.tekufa_list = []
         tekufa_ics_path = self.template_path.parent / "tekufa_2025_2035.ics"
@@ -511,20 +575,71 @@ class ShabbatScheduleGenerator:
         else:
             print(f"⚠️ Fichier tekufa_2025_2035.ics non trouvé à {tekufa_ics_path}")
 
+    @cached_property
+    def _font(self):
+        # Polices chargées au premier rendu seulement (inutile pour la mise à jour Excel seule)
+        return ImageFont.truetype(str(self.font_path), 30)
+
+    @cached_property
+    def _arial_bold_font(self):
+        return ImageFont.truetype(str(self.arial_bold_path), 40)
+
+    def sunset_for(self, day):
+        return _sunset_cached(self.ramat_gan.latitude, self.ramat_gan.longitude, JERUSALEM_TZ, day)
+
+    def sunset_minutes(self, day):
+        s = self.sunset_for(day)
+        return s.hour * 60 + s.minute
+
     def sanitize_filename(self, value: str) -> str:
-        nfkd = unicodedata.normalize('NFKD', value)
-        ascii_str = nfkd.encode('ascii', 'ignore').decode('ascii')
-        ascii_str = re.sub(r'[^\w\s-]', '', ascii_str).strip()
-        return re.sub(r'\s+', '_', ascii_str)
-
-    def determine_season(self):
-        today = datetime.now()
-        year = today.year
-        start_summer = datetime(year, 3, 29)
-        end_summer = datetime(year, 10, 26)
-        return "summer" if start_summer <= today <= end_summer else "winter"
+        if value.isascii():
+            ascii_str = value  # NFKD + encode ascii ne changent rien
+        else:
+            nfkd = unicodedata.normalize('NFKD', value)
+            ascii_str = nfkd.encode('ascii', 'ignore').decode('ascii')
+        ascii_str = _SLUG_STRIP.sub('', ascii_str).strip()
+        return _SLUG_SPACE.sub('_', ascii_str)
+
+    def determine_season(self, day=None):
+        if day is None:
+            day = date.today()
+        return _season_for(day)
+
+    def _hebcal_get_json(self, url, params):
+        # Cache disque des réponses Hebcal, clé = (url, params), expiration HEBCAL_CACHE_TTL
+        key = url + "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+        cache = {}
+        if self._hebcal_cache_path.exists():
+            try:
+                with open(self._hebcal_cache_path, encoding="utf-8") as f:
+                    cache = json.load(f)
+            except (OSError, ValueError):
+                cache = {}
+        entry = cache.get(key)
+        if entry and time.time() - entry["timestamp"] < HEBCAL_CACHE_TTL:
+            return entry["data"]
+
+        response = self._session.get(url, params=params, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+        cache[key] = {"timestamp": time.time(), "data": data}
+        try:
+            with open(self._hebcal_cache_path, "w", encoding="utf-8") as f:
+                json.dump(cache, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"⚠️ Impossible d'écrire le cache Hebcal : {e}")
+        return data
 
     def fetch_roshchodesh_dates(self, start_date, end_date):
+        key = (start_date, end_date)
+        if key not in self._roshchodesh_cache:
+            rosh_dates = self._fetch_roshchodesh_dates(start_date, end_date)
+            if not rosh_dates:
+                return rosh_dates  # échec réseau : ne pas mémoriser
+            self._roshchodesh_cache[key] = rosh_dates
+        return list(self._roshchodesh_cache[key])
+
+    def _fetch_roshchodesh_dates(self, start_date, end_date):
         url = "https://www.hebcal.com/hebcal"
         params = {
             "v": 1,
@@ -536,14 +651,12 @@ class ShabbatScheduleGenerator:
             "nx": "on"
         }
         try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = self._hebcal_get_json(url, params)
             rosh_dates = []
             seen_dates = set()
             for item in data.get("items", []):
                 if item.get("category") == "roshchodesh":
-                    dt = datetime.fromisoformat(item["date"]).astimezone(pytz.timezone("Asia/Jerusalem")).date()
+                    dt = datetime.fromisoformat(item["date"]).astimezone(JERUSALEM_TZ).date()
                     if dt not in seen_dates:
                         rosh_dates.append(dt)
                         seen_dates.add(dt)
@@ -553,25 +666,23 @@ class ShabbatScheduleGenerator:
             return []
 
     def get_mevarchim_friday(self, rosh_date):
-        if rosh_date.weekday() == 4:
-            return rosh_date - timedelta(days=7)
-        elif rosh_date.weekday() == 5:
-            return rosh_date - timedelta(days=8)
-        else:
-            delta = (rosh_date.weekday() - 4 + 7) % 7
-            return rosh_date - timedelta(days=delta)
+        return rosh_date - timedelta(days=MEVARCHIM_OFFSETS[rosh_date.weekday()])
 
     def identify_shabbat_mevarchim(self, shabbat_df, rosh_dates):
         shabbat_df = shabbat_df.copy()
         if "day" not in shabbat_df.columns and "תאריך" in shabbat_df.columns:
             shabbat_df["day"] = pd.to_datetime(shabbat_df["תאריך"], format="%d/%m/%Y").dt.date
-        shabbat_df["day"] = pd.to_datetime(shabbat_df["day"], format="%Y-%m-%d %H:%M:%S", errors='coerce').dt.date.fillna(shabbat_df["day"])
-        mevarchim_set = set()
-        for rd in rosh_dates:
-            mevarchim_friday = self.get_mevarchim_friday(rd)
-            if mevarchim_friday < rd and mevarchim_friday in shabbat_df["day"].values:
-                mevarchim_set.add(mevarchim_friday)
-        shabbat_df["שבת מברכין"] = shabbat_df["day"].isin(mevarchim_set)
+        first_day = shabbat_df["day"].iat[0] if len(shabbat_df) else None
+        if not (isinstance(first_day, date) and not isinstance(first_day, datetime)):
+            # Colonne relue depuis Excel (Timestamp / texte) : conversion en datetime.date
+            shabbat_df["day"] = pd.to_datetime(shabbat_df["day"], format="%Y-%m-%d %H:%M:%S", errors='coerce').dt.date.fillna(shabbat_df["day"])
+        mevarchim_fridays = get_mevarchim_fridays(rosh_dates)
+        days = np.array(shabbat_df["day"].tolist(), dtype="datetime64[D]")
+        is_mevarchim = np.zeros(len(days), dtype=bool)
+        if len(mevarchim_fridays):
+            idx = np.minimum(np.searchsorted(mevarchim_fridays, days), len(mevarchim_fridays) - 1)
+            is_mevarchim = mevarchim_fridays[idx] == days
+        shabbat_df["שבת מברכין"] = is_mevarchim
         return shabbat_df
 
     def get_tekufa_for_shabbat(self, shabbat_date):
@@ -582,16 +693,10 @@ class ShabbatScheduleGenerator:
                 return dt, summary
         return None
 
-    def get_tekufa_for_next_week(self, shabbat_date):
-        week_start = datetime.combine(shabbat_date, datetime.min.time())
-        week_end = week_start + timedelta(days=6, hours=23, minutes=59)
-        for dt, summary in self.tekufa_list:
-            if week_start <= dt <= week_end:
-                return dt, summary
-        return None
+    # Même fenêtre que la colonne tekoufa du classeur : du vendredi (jour du tableau) 00:00 au jeudi suivant 23:59
+    get_tekufa_for_next_week = get_tekufa_for_shabbat
 
-    def update_excel_with_mevarchim_column(self, excel_path: Path):
-        import openpyxl
+    def update_excel_with_mevarchim_column(self, excel_path: Path, write=True):
         # Charger tous les onglets existants
         if excel_path.exists():
             xls = pd.ExcelFile(excel_path)
@@ -599,77 +704,49 @@ class ShabbatScheduleGenerator:
             if "שבתות השנה" in sheets:
                 df = sheets["שבתות השנה"]
             else:
-                df = pd.DataFrame(self.yearly_shabbat_data)
-                df["day"] = pd.to_datetime(df["day"], format="%Y-%m-%d %H:%M:%S").dt.date
+                df = self._yearly_df.copy()
         else:
             sheets = {}
-            df = pd.DataFrame(self.yearly_shabbat_data)
-            df["day"] = pd.to_datetime(df["day"], format="%Y-%m-%d %H:%M:%S").dt.date
+            df = self._yearly_df.copy()
 
         min_date = df["day"].min()
         max_date = df["day"].max()
         rosh_dates = self.fetch_roshchodesh_dates(min_date, max_date + timedelta(days=7))
         df = self.identify_shabbat_mevarchim(df, rosh_dates)
 
-        # CALCUL des colonnes horaires intermédiaires
-        def compute_times(row):
-            row_date = row["day"]
-            if isinstance(row_date, pd.Timestamp):
-                row_date = row_date.date()
-            sunday_date = row_date + timedelta(days=2)
-            s_sunday = sun(self.ramat_gan.observer, date=sunday_date, tzinfo=self.ramat_gan.timezone)
-            sunday_sunset = s_sunday["sunset"].strftime("%H:%M")
-            thursday_date = sunday_date + timedelta(days=4)
-            s_thu = sun(self.ramat_gan.observer, date=thursday_date, tzinfo=self.ramat_gan.timezone)
-            thursday_sunset = s_thu["sunset"].strftime("%H:%M")
-
-            def to_minutes(t):
-                h, m = map(int, t.split(":"))
-                return h * 60 + m
-
-            if sunday_sunset and thursday_sunset:
-                sunday_sunset_min = to_minutes(sunday_sunset)
-                thursday_sunset_min = to_minutes(thursday_sunset)
-                min_sunset = min(sunday_sunset_min, thursday_sunset_min)
-                max_sunset = max(sunday_sunset_min, thursday_sunset_min)
-                minha_midweek = self.format_time(self.round_to_nearest_five(min_sunset - 18))
-                arvit_midweek = self.format_time(self.round_to_next_five(max_sunset + 20))
-            else:
-                minha_midweek = ""
-                arvit_midweek = ""
-
-            return pd.Series({
-                "שקיעה Dimanche": sunday_sunset,
-                "שקיעה Jeudi": thursday_sunset,
-                "מנחה ביניים": minha_midweek,
-                "ערבית ביניים": arvit_midweek
-            })
+        # CALCUL des colonnes horaires intermédiaires (en minutes, une seule passe)
+        # Dimanche (+2 j) et jeudi (+6 j) de chaque semaine, calculés sur tout le tableau d'un coup
+        days = np.array(df["day"].tolist(), dtype="datetime64[D]")
+        sunday_sunset_min = np.array([self.sunset_minutes(d) for d in (days + 2).astype(object)], dtype=np.int16)
+        thursday_sunset_min = np.array([self.sunset_minutes(d) for d in (days + 6).astype(object)], dtype=np.int16)
 
-        times_df = df.apply(compute_times, axis=1)
+        minha_midweek_min = self.round_to_nearest_five(np.minimum(sunday_sunset_min, thursday_sunset_min) - 18)
+        arvit_midweek_min = self.round_to_next_five(np.maximum(sunday_sunset_min, thursday_sunset_min) + 20)
 
-        # Supprimer les anciennes colonnes si présentes
-        cols_to_remove = ["שקיעה Dimanche", "שקיעה Jeudi", "מנחה ביניים", "ערבית ביניים"]
-        for col in cols_to_remove:
-            if col in df.columns:
-                df.drop(col, axis=1, inplace=True)
+        midweek_columns = {
+            "שקיעה Dimanche": format_time_array(sunday_sunset_min),
+            "שקיעה Jeudi": format_time_array(thursday_sunset_min),
+            "מנחה ביניים": format_time_array(minha_midweek_min),
+            "ערבית ביניים": format_time_array(arvit_midweek_min),
+        }
 
-        df = pd.concat([df, times_df], axis=1)
+        # Supprimer les anciennes colonnes si présentes, puis les ajouter en fin de tableau (sans pd.concat)
+        df.drop(columns=[col for col in midweek_columns if col in df.columns], inplace=True)
+        for col, values in midweek_columns.items():
+            df[col] = values
 
         # Ajout de la colonne molad uniquement pour שבת מברכין
-        molad_col = []
-        for i, row in df.iterrows():
-            is_mevarchim = row.get("שבת מברכין") in [True, "כן"]
-            if is_mevarchim:
-                try:
-                    shabbat_date_val = row["day"]
-                    if isinstance(shabbat_date_val, pd.Timestamp):
-                        shabbat_date_val = shabbat_date_val.date()
-                    molad_str = get_next_month_molad(shabbat_date_val)
-                except Exception:
-                    molad_str = ""
-            else:
-                molad_str = ""
-            molad_col.append(molad_str)
+        # (masque vectorisé : le calcul du molad ne tourne que sur les ~12 lignes concernées, sans iterrows)
+        molad_col = np.full(len(df), "", dtype=object)
+        mevarchim_rows = np.flatnonzero(df["שבת מברכין"].isin([True, "כן"]).to_numpy())
+        for i in mevarchim_rows:
+            try:
+                shabbat_date_val = df["day"].iat[i]
+                if isinstance(shabbat_date_val, pd.Timestamp):
+                    shabbat_date_val = shabbat_date_val.date()
+                molad_col[i] = get_next_month_molad(shabbat_date_val)
+            except Exception:
+                pass
         df["molad"] = molad_col
 
         # Ajout de la colonne tekoufa
@@ -693,105 +770,120 @@ class ShabbatScheduleGenerator:
 
         # Mise à jour de la feuille
         sheets["שבתות השנה"] = df
+        self._sheets = sheets
+
+        # Écriture de tous les onglets (ou différée jusqu'à update_excel / fin de generate)
+        if write:
+            self._write_workbook(excel_path, sheets)
+        else:
+            self._pending_workbook = excel_path
 
-        # Écriture de tous les onglets
-        with pd.ExcelWriter(str(excel_path), engine="openpyxl", mode="w") as writer:
+        print("✅ Colonnes mises à jour : שבת מברכין, horaires ביניים, molad (sélectif) et tekoufa (fin).")
+
+    def _write_workbook(self, excel_path, sheets):
+        # Empreinte du contenu : si identique à la dernière écriture (et fichier non modifié depuis), on ne réécrit pas
+        digest = hashlib.sha1()
+        for name, sheet_df in sheets.items():
+            digest.update(name.encode("utf-8"))
+            digest.update(sheet_df.to_csv(index=False).encode("utf-8"))
+        content_hash = digest.hexdigest()
+        excel_path = Path(excel_path)
+        if excel_path.exists() and self._workbook_hash_path.exists():
+            try:
+                with open(self._workbook_hash_path, encoding="utf-8") as f:
+                    previous = json.load(f)
+                if (previous.get("hash") == content_hash
+                        and previous.get("mtime_ns") == excel_path.stat().st_mtime_ns):
+                    print("ℹ️ Classeur inchangé : pas de réécriture.")
+                    return
+            except (OSError, ValueError):
+                pass
+
+        # Réécriture complète : xlsxwriter sérialise plus vite qu'openpyxl (lecture/ajout restent en openpyxl)
+        with pd.ExcelWriter(str(excel_path), engine="xlsxwriter") as writer:
             for name, sheet_df in sheets.items():
                 sheet_df.to_excel(writer, sheet_name=name, index=False)
 
-        print("✅ Colonnes mises à jour : שבת מברכין, horaires ביניים, molad (sélectif) et tekoufa (fin).")
+        try:
+            with open(self._workbook_hash_path, "w", encoding="utf-8") as f:
+                json.dump({"hash": content_hash, "mtime_ns": excel_path.stat().st_mtime_ns}, f)
+        except OSError as e:
+            print(f"⚠️ Impossible d'écrire l'empreinte du classeur : {e}")
 
     def get_shabbat_times_from_excel_file(self, current_date):
         excel_path = self.output_dir / "horaires_shabbat.xlsx"
-        if excel_path.exists():
-            try:
-                df = pd.read_excel(excel_path, sheet_name="שבתות השנה")
-                if "day" not in df.columns and "תאריך" in df.columns:
-                    df["day"] = pd.to_datetime(df["תאריך"], format="%d/%m/%Y").dt.date
-                else:
-                    df["day"] = pd.to_datetime(df["day"], format="%Y-%m-%d %H:%M:%S", errors='coerce').dt.date.fillna(df["day"])
-                
-                today_date = current_date.date()
-                df = df[df["day"] >= today_date].sort_values(by="day")
-                if df.empty:
-                    return None
-                
-                row = df.iloc[0]
-                
-                # ✅ FIX: Assure-toi que la date est datetime.date
-                shabbat_date_val = row["day"]
-                if isinstance(shabbat_date_val, pd.Timestamp):
-                    shabbat_date_val = shabbat_date_val.date()
-                elif isinstance(shabbat_date_val, (int, float)):
-                    # Si c'est un nombre, essaie de convertir
-                    try:
-                        shabbat_date_val = datetime.fromordinal(int(shabbat_date_val)).date()
-                    except:
-                        shabbat_date_val = pd.Timestamp(shabbat_date_val).date()
-                
-                print(f"DEBUG: shabbat_date_val = {shabbat_date_val} ({type(shabbat_date_val)})")  # 🔍 Pour vérifier
-                
-                shabbat_date = datetime.combine(shabbat_date_val, datetime.min.time())
-                candle_time = datetime.strptime(str(row["כנסית שבת"]), "%H:%M").time()
-                havdalah_time = datetime.strptime(str(row["צאת שבת"]), "%H:%M").time()
-                shabbat_start = datetime.combine(shabbat_date_val, candle_time)
-                shabbat_end = datetime.combine(shabbat_date_val, havdalah_time)
-                is_mevarchim_excel = row.get("שבת מברכין", False) == True or row.get("שבת מברכין", "") == "Oui"
-                
-                return [{
-                    "date": shabbat_date_val,  # ✅ Utilise la valeur corrigée
-                    "start": shabbat_start,
-                    "end": shabbat_end,
-                    "parasha": row.get("פרשה", ""),
-                    "parasha_hebrew": row.get("פרשה_עברית", row.get("פרשה", "")),  # ✅ FIX: rowget -> row.get
-                    "candle_lighting": row["כנסית שבת"],
-                    "is_mevarchim": is_mevarchim_excel
-                }]
-            except Exception as e:
-                print(f"❌ Erreur lors de la lecture du fichier Excel: {e}")
-                import traceback
-                traceback.print_exc()  # 🔍 Affiche le message d'erreur complet
-                return None
-        else:
+        if self._sheets is None and not excel_path.exists():
             print("Fichier Excel non trouvé, utilisation des données intégrées")
-            df = pd.DataFrame(self.yearly_shabbat_data)
-            df["day"] = pd.to_datetime(df["day"], format="%Y-%m-%d %H:%M:%S").dt.date
-            roshchodesh_start = df["day"].min()
-            roshchodesh_end = df["day"].max()
-            rosh_dates = self.fetch_roshchodesh_dates(roshchodesh_start, roshchodesh_end)
+            df = self._yearly_df.copy()
+            rosh_dates = self.fetch_roshchodesh_dates(df["day"].min(), df["day"].max())
             df = self.identify_shabbat_mevarchim(df, rosh_dates)
-            df = df[df["day"] >= current_date.date()].sort_values(by="day")
-            if df.empty:
-                return None
-            row = df.iloc[0]
-            shabbat_date_val = row["day"]
-            if isinstance(shabbat_date_val, pd.Timestamp):
-                shabbat_date_val = shabbat_date_val.date()
-            shabbat_date = datetime.combine(shabbat_date_val, datetime.min.time())
-            candle_time = datetime.strptime(str(row["כנסית שבת"]), "%H:%M").time()
-            havdalah_time = datetime.strptime(str(row["צאת שבת"]), "%H:%M").time()
-            shabbat_start = datetime.combine(shabbat_date_val, candle_time)
-            shabbat_end = datetime.combine(shabbat_date_val, havdalah_time)
-            is_mevarchim_excel = row.get("שבת מברכין", False) == True or row.get("שבת מברכין", "") == "Oui"
-            return [{
-                "date": shabbat_date_val,
-                "start": shabbat_start,
-                "end": shabbat_end,
-                "parasha": row.get("פרשה", ""),
-                "parasha_hebrew": row.get("פרשה_עברית", row.get("פרשה", "")),  # ✅ FIX: rowget -> row.get
-                "candle_lighting": row["כנסית שבת"],
-                "is_mevarchim": is_mevarchim_excel
-            }]
-
-    def round_to_nearest_five(self, minutes):
+            return self._next_shabbat_entry(df, self._yearly_days, current_date)
+
+        try:
+            if self._sheets is not None:
+                # Feuille déjà en mémoire (écrite pendant ce run) : pas de relecture openpyxl
+                df = self._sheets["שבתות השנה"].copy()
+            else:
+                df = pd.read_excel(excel_path, sheet_name="שבתות השנה")
+            if "day" not in df.columns and "תאריך" in df.columns:
+                df["day"] = pd.to_datetime(df["תאריך"], format="%d/%m/%Y").dt.date
+            else:
+                df["day"] = pd.to_datetime(df["day"], format="%Y-%m-%d %H:%M:%S", errors='coerce').dt.date.fillna(df["day"])
+            df = df.sort_values(by="day").reset_index(drop=True)
+            days = np.array(df["day"].tolist(), dtype="datetime64[D]")
+            return self._next_shabbat_entry(df, days, current_date)
+        except Exception as e:
+            print(f"❌ Erreur lors de la lecture du fichier Excel: {e}")
+            import traceback
+            traceback.print_exc()  # 🔍 Affiche le message d'erreur complet
+            return None
+
+    def _next_shabbat_entry(self, df, days, current_date):
+        # Premier Chabbat >= current_date ; days est trié (datetime64[D]) et aligné sur df
+        idx = np.searchsorted(days, np.datetime64(current_date.date(), "D"), side="left")
+        if idx >= len(df):
+            return None
+        row = df.iloc[idx]
+
+        # ✅ FIX: Assure-toi que la date est datetime.date
+        shabbat_date_val = row["day"]
+        if isinstance(shabbat_date_val, pd.Timestamp):
+            shabbat_date_val = shabbat_date_val.date()
+        if DEBUG:
+            print(f"DEBUG: shabbat_date_val = {shabbat_date_val} ({type(shabbat_date_val)})")  # 🔍 Pour vérifier
+
+        return [self._shabbat_entry(row, shabbat_date_val)]
+
+    def _shabbat_entry(self, row, shabbat_date_val):
+        # "HH:MM" -> datetime via fromisoformat (parseur C, sans strptime)
+        day_str = shabbat_date_val.isoformat()
+        shabbat_start = datetime.fromisoformat(f"{day_str} {row['כנסית שבת']}")
+        shabbat_end = datetime.fromisoformat(f"{day_str} {row['צאת שבת']}")
+        is_mevarchim_excel = row.get("שבת מברכין", False) == True or row.get("שבת מברכין", "") == "Oui"
+        return {
+            "date": shabbat_date_val,  # ✅ Utilise la valeur corrigée
+            "start": shabbat_start,
+            "end": shabbat_end,
+            "parasha": row.get("פרשה", ""),
+            "parasha_hebrew": row.get("פרשה_עברית", row.get("פרשה", "")),  # ✅ FIX: rowget -> row.get
+            "candle_lighting": row["כנסית שבת"],
+            "is_mevarchim": is_mevarchim_excel
+        }
+
+    @staticmethod
+    def round_to_nearest_five(minutes):
         return (minutes // 5) * 5
 
-    def round_to_next_five(self, minutes):
+    @staticmethod
+    def round_to_next_five(minutes):
         return ((minutes + 4) // 5) * 5 if minutes is not None else None
 
-    def format_time(self, minutes):
+    @staticmethod
+    def format_time(minutes):
         if minutes is None or minutes < 0:
             return ""
+        if minutes < 24 * 60:
+            return TIME_LUT[minutes]
         h = minutes // 60
         m = minutes % 60
         return f"{h:02d}:{m:02d}"
@@ -799,19 +891,17 @@ class ShabbatScheduleGenerator:
     def calculate_times(self, shabbat_start, shabbat_end):
         start_minutes = shabbat_start.hour * 60 + shabbat_start.minute
         end_minutes = shabbat_end.hour * 60 + shabbat_end.minute
-        tehilim_ete = self.round_to_nearest_five(17 * 60)
-        tehilim_hiver = self.round_to_nearest_five(15 * 60)
-        tehilim = tehilim_ete if self.season == "summer" else tehilim_hiver
+        tehilim = TEHILIM_ETE_MIN if self.season == "summer" else TEHILIM_HIVER_MIN
 
         times = {
             "mincha_kabbalat": start_minutes,
             "shir_hashirim": self.round_to_nearest_five(start_minutes - 10),
-            "shacharit": self.round_to_nearest_five(7 * 60 + 45),
-            "mincha_gdola": self.round_to_nearest_five(12 * 60 + (45 if self.season == "winter" else 60)),
+            "shacharit": SHACHARIT_MIN,
+            "mincha_gdola": self._mincha_gdola,
             "tehilim": tehilim,
-            "tehilim_ete": tehilim_ete,
-            "tehilim_hiver": tehilim_hiver,
-            "shiur_nashim": 16 * 60 + 00,
+            "tehilim_ete": TEHILIM_ETE_MIN,
+            "tehilim_hiver": TEHILIM_HIVER_MIN,
+            "shiur_nashim": SHIUR_NASHIM_MIN,
             "arvit_hol": None,
             "arvit_motsach": None,
             "mincha_2": None,
@@ -824,57 +914,47 @@ class ShabbatScheduleGenerator:
             times["shir_hashirim"] = start_minutes - 10
 
         times["mincha_2"] = self.round_to_nearest_five(end_minutes - 90)
-        times["shiur_rav"] = self.round_to_nearest_five(times["mincha_2"] - 45)
-        times["parashat_hashavua"] = self.round_to_nearest_five(times["shiur_rav"] - 45)
+        times["shiur_rav"] = times["mincha_2"] - 45  # mincha_2 est déjà arrondi à 5
+        times["parashat_hashavua"] = times["shiur_rav"] - 45
 
+        # Couchers du soleil dimanche / jeudi directement en minutes (mêmes entrées de cache que le classeur)
         sunday_date = shabbat_start.date() + timedelta(days=2)
-        s_sunday = sun(self.ramat_gan.observer, date=sunday_date, tzinfo=self.ramat_gan.timezone)
-        sunday_sunset = s_sunday.get("sunset", None)
-        thursday_date = sunday_date + timedelta(days=4)
-        s_thursday = sun(self.ramat_gan.observer, date=thursday_date, tzinfo=self.ramat_gan.timezone)
-        thursday_sunset = s_thursday.get("sunset", None)
-
-        def to_minutes(t):
-            if t is None:
-                return None
-            try:
-                h, m = map(int, t.split(":"))
-                return h * 60 + m
-            except ValueError:
-                return None
-
-        if sunday_sunset and thursday_sunset:
-            sunday_sunset_str = sunday_sunset.strftime("%H:%M")
-            thursday_sunset_str = thursday_sunset.strftime("%H:%M")
-            sunday_sunset_min = to_minutes(sunday_sunset_str)
-            thursday_sunset_min = to_minutes(thursday_sunset_str)
-            min_sunset = min(sunday_sunset_min, thursday_sunset_min)
-            minha_hol_minutes = min_sunset - 18
-            times["mincha_hol"] = self.round_to_nearest_five(minha_hol_minutes)
-            max_sunset = max(sunday_sunset_min, thursday_sunset_min)
-            arvit_hol_minutes = max_sunset + 20
-            times["arvit_hol"] = self.round_to_next_five(arvit_hol_minutes)
-        else:
-            times["mincha_hol"] = None
-            times["arvit_hol"] = None
+        sunday_sunset_min = self.sunset_minutes(sunday_date)
+        thursday_sunset_min = self.sunset_minutes(sunday_date + timedelta(days=4))
+        times["mincha_hol"] = self.round_to_nearest_five(min(sunday_sunset_min, thursday_sunset_min) - 18)
+        times["arvit_hol"] = self.round_to_next_five(max(sunday_sunset_min, thursday_sunset_min) + 20)
 
         times["arvit_motsach"] = self.round_to_nearest_five(end_minutes - 9)
 
         return times
 
+    def _get_template(self, path):
+        # Template JPEG décodé une seule fois par instance, puis copié à chaque rendu
+        if path not in self._templates:
+            with Image.open(path) as tpl:
+                self._templates[path] = tpl.convert("RGB")
+        return self._templates[path].copy()
+
+    def _get_icons(self):
+        # Charger les icônes UNE SEULE FOIS par instance (GÉRER LES EXCEPTIONS)
+        if self._icons is None:
+            icon_path = self.template_path.parent / "resources"
+            icons = {"first_moon": None, "full_moon": None, "eau": None}
+            try:
+                icons["first_moon"] = Image.open(icon_path / "first_moon.png").convert("RGBA").resize((48, 48), Image.LANCZOS)
+                icons["full_moon"] = Image.open(icon_path / "full_moon.png").convert("RGBA").resize((48, 48), Image.LANCZOS)
+                icons["eau"] = Image.open(icon_path / "eau.png").resize((64, 64), Image.LANCZOS)
+            except FileNotFoundError as e:
+                print(f"❌ Erreur: Une ou plusieurs icônes sont introuvables: {e}")
+            self._icons = icons
+        return self._icons
+
     def create_image(self, times, parasha, parasha_hebrew,
                      shabbat_end, candle_lighting, shabbat_date, is_mevarchim=False):
         try:
-            template = self.template_path
-            if is_mevarchim:
-                rc_template = self.template_path.parent / "template_rosh_hodesh.jpg"
-                if rc_template.exists():
-                    template = rc_template
-
-            # Définir le chemin d'accès aux icônes (UNE SEULE FOIS)
-            icon_path = self.template_path.parent / "resources"
+            template = self._rc_template_path if is_mevarchim else self.template_path
 
-            with Image.open(template) as img:
+            with self._get_template(template) as img:
                 try:
                     img_w, img_h = img.size  # Définir img_w et img_h ici
                     draw = ImageDraw.Draw(img)
@@ -882,18 +962,10 @@ class ShabbatScheduleGenerator:
                     bold = self._arial_bold_font
                     time_x = 120
 
-                    # Charger les icônes (UNE SEULE FOIS, GÉRER LES EXCEPTIONS)
-                    first_moon_icon = None
-                    full_moon_icon = None
-                    eau_icon = None
-                    eau2_icon = None
-
-                    try:
-                        first_moon_icon = Image.open(icon_path / "first_moon.png").convert("RGBA").resize((48, 48), Image.LANCZOS)
-                        full_moon_icon = Image.open(icon_path / "full_moon.png").convert("RGBA").resize((48, 48), Image.LANCZOS)
-                        eau_icon = Image.open(icon_path / "eau.png").resize((64, 64), Image.LANCZOS)
-                    except FileNotFoundError as e:
-                        print(f"❌ Erreur: Une ou plusieurs icônes sont introuvables: {e}")
+                    icons = self._get_icons()
+                    first_moon_icon = icons["first_moon"]
+                    full_moon_icon = icons["full_moon"]
+                    eau_icon = icons["eau"]
 
                     # Affichage des horaires
                     time_positions = [
@@ -912,17 +984,16 @@ class ShabbatScheduleGenerator:
                         if key == 'tehilim':
                             if self.season == "summer":
                                 formatted_time = f"{self.format_time(times['tehilim_ete'])}" #/{self.format_time(times['tehilim_hiver'])}"
-                                draw.text((x, y), formatted_time, fill="black", font=font)
+                                draw_text_cached(img, (x, y), formatted_time, font, "black")
                             else:
-                                draw.text((x, y), self.format_time(times['tehilim']), fill="black", font=font)
+                                draw_text_cached(img, (x, y), self.format_time(times['tehilim']), font, "black")
                         else:
-                            draw.text((x, y), self.format_time(times[key]), fill="black", font=font)
+                            draw_text_cached(img, (x, y), self.format_time(times[key]), font, "black")
 
-                    draw.text((time_x, 440), candle_lighting, fill="black", font=font)
-                    draw.text((time_x, 830), shabbat_end.strftime("%H:%M"), fill="black", font=font)
-                    draw.text((time_x, 950), self.format_time(times.get('mincha_hol')), fill="green", font=font)
-                    draw.text((time_x, 990), self.format_time(times.get('arvit_hol')), fill="green", font=font)
-                    reversed_parasha = reverse_hebrew_text(parasha_hebrew)
+                    draw_text_cached(img, (time_x, 440), candle_lighting, font, "black")
+                    draw_text_cached(img, (time_x, 830), shabbat_end.strftime("%H:%M"), font, "black")
+                    draw_text_cached(img, (time_x, 950), self.format_time(times.get('mincha_hol')), font, "green")
+                    draw_text_cached(img, (time_x, 990), self.format_time(times.get('arvit_hol')), font, "green")
                     draw.text((300, 280), parasha_hebrew, fill="blue", font=bold, anchor="mm")
 
                     if is_mevarchim:
@@ -932,7 +1003,8 @@ class ShabbatScheduleGenerator:
                         else:
                             shabbat_date_for_molad = shabbat_date
                         
-                        print(f"DEBUG: shabbat_date_for_molad = {shabbat_date_for_molad} ({type(shabbat_date_for_molad)})")
+                        if DEBUG:
+                            print(f"DEBUG: shabbat_date_for_molad = {shabbat_date_for_molad} ({type(shabbat_date_for_molad)})")
                         molad_str = get_next_month_molad(shabbat_date_for_molad)
                         draw.text((200, img_h - 300), molad_str, fill="blue", font=font)
                         rc_days = get_rosh_chodesh_days_for_next_month(shabbat_date_for_molad)
@@ -999,8 +1071,6 @@ class ShabbatScheduleGenerator:
                         for fast in fasts:
                             hebrew_name = fast["nom"]
                             line = f"צום {hebrew_name}: {fast['start']} - {fast['end']}"
-                            if eau2_icon:
-                                img.paste(eau2_icon, (55, fast_y - 10), eau2_icon)
                             draw.text((55 + 64 + 10, fast_y), line, fill="black", font=font)
                             fast_y += 50
 
@@ -1027,11 +1097,31 @@ class ShabbatScheduleGenerator:
                     output_filename = f"horaires_{safe_parasha}.jpeg"
                     output_path = self.output_dir / output_filename
                     print(f"✅ Image sauvegardée ici : {output_path}")  # Ajout d'une instruction de débogage
-                    img.save(str(output_path))
+                    # Huffman optimisé + progressif : ~20 % plus léger pour la page publiée, même qualité (75)
+                    # Écriture dans un fichier temporaire puis rename : on n'écrit jamais à travers le lien
+                    # physique de latest-schedule.jpg (qui pointe encore sur l'ancienne image)
+                    output_tmp = output_path.with_name(output_path.name + ".tmp")
+                    try:
+                        img.save(str(output_tmp), format="JPEG", quality=75, optimize=True, progressive=True)
+                        os.replace(output_tmp, output_path)
+                    except BaseException:
+                        # Pas de .tmp orphelin dans output/ (dossier versionné par le workflow)
+                        if output_tmp.exists():
+                            output_tmp.unlink()
+                        raise
                     latest = self.output_dir / "latest-schedule.jpg"
-                    if latest.exists():
-                        latest.unlink()
-                    shutil.copy(str(output_path), str(latest))
+                    latest_tmp = latest.with_suffix(".tmp")
+                    if latest_tmp.exists() or latest_tmp.is_symlink():
+                        latest_tmp.unlink()
+                    try:
+                        # Lien physique : pas de seconde copie du JPEG
+                        os.link(output_path, latest_tmp)
+                    except OSError:
+                        shutil.copy(str(output_path), str(latest_tmp))
+                    os.replace(latest_tmp, latest)  # remplacement atomique de latest-schedule.jpg
+                    # rename() ne fait rien si source et cible sont déjà le même fichier : ne pas laisser le .tmp
+                    if latest_tmp.exists():
+                        latest_tmp.unlink()
                     return output_path
                 except Exception as e:
                     print(f"❌ Erreur lors du traitement de l'image: {e}")
@@ -1081,14 +1171,35 @@ class ShabbatScheduleGenerator:
 
         try:
             # Écrire les données de ce Chabbat dans un onglet 'השבת'
-            df_current = pd.DataFrame([row])
-            with pd.ExcelWriter(excel_path, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
-                df_current.to_excel(writer, sheet_name="השבת", index=False)
+            if self._sheets is not None:
+                # Onglets déjà en mémoire : réécriture séquentielle sans recharger le classeur
+                self._sheets["השבת"] = pd.DataFrame([row])
+                self._pending_workbook = None
+                self._write_workbook(excel_path, self._sheets)
+            else:
+                # Une seule ligne : ajout direct via openpyxl, sans passer par le formateur pandas
+                import openpyxl
+                wb = openpyxl.load_workbook(excel_path)
+                if "השבת" in wb.sheetnames:
+                    del wb["השבת"]
+                ws = wb.create_sheet("השבת")
+                ws.append(list(row.keys()))
+                ws.append(list(row.values()))
+                wb.save(excel_path)
             print("✅ Onglet 'THIS SHABBAT' mis à jour avec les données du Chabbat en cours.")
         except Exception as e:
             print(f"❌ Erreur lors de la mise à jour de l'Excel: {e}")
 
     def generate(self, current_date=None):
+        try:
+            self._generate(current_date)
+        finally:
+            # Écriture différée non faite par update_excel (ex. aucun horaire trouvé)
+            if self._pending_workbook is not None:
+                self._write_workbook(self._pending_workbook, self._sheets)
+                self._pending_workbook = None
+
+    def _generate(self, current_date):
         if current_date is None:
             current_date = datetime.now()
         shabbat_times = self.get_shabbat_times_from_excel_file(current_date)
@@ -1142,7 +1253,7 @@ def main():
         generator = ShabbatScheduleGenerator(
             template_path, font_path, arial_bold, output_dir
         )
-        generator.update_excel_with_mevarchim_column(generator.output_dir / "horaires_shabbat.xlsx")
+        generator.update_excel_with_mevarchim_column(generator.output_dir / "horaires_shabbat.xlsx", write=False)
         generator.generate(custom_date)
         
     except Exception as e: